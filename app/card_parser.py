@@ -1,7 +1,18 @@
+from urllib.parse import urljoin
+
 from bs4 import BeautifulSoup
 
 BASE_URL = "https://www.clinicaltrialsregister.eu"
 
+# Columns of the disease classification table, in order
+DISEASE_KEYS = ("version", "soc_term", "classification_code", "term", "level")
+
+# Translation tables for cleaning cell text in a single pass
+_NL_TBL = str.maketrans("", "", "\n")
+_SPACE_TBL = str.maketrans("", "", " \n")
+_DATE_TBL = str.maketrans("", "", "*: \n")
+_STATUS_TBL = str.maketrans("", "", "()\n")
+
 
 class CardParser:
     """
@@ -16,10 +27,15 @@ class CardParser:
         card (BeautifulSoup): The BeautifulSoup object representing the HTML of the trial card.
     """
 
+    __slots__ = ("card", "data", "table_exists", "_rows", "_row_tds", "_disease_table")
+
     def __init__(self, card: BeautifulSoup):
         self.card = card
         self.data = {}
         self.table_exists = False
+        self._rows = []
+        self._row_tds = []
+        self._disease_table = None
 
     def parse(self):
         """
@@ -34,6 +50,9 @@ class CardParser:
             dict: A dictionary containing all parsed information from the trial card.
         """
 
+        self._rows = self.card.find_all("tr")
+        self._row_tds = [row.find_all("td") for row in self._rows]
+
         self.check_table_exists()
         # Note: The "Disease" row could be present in a table format or a row format
 
@@ -71,7 +90,8 @@ class CardParser:
         flag is later used to determine the parsing strategy for disease-related data.
         """
 
-        if self.card.find("table"):
+        self._disease_table = self.card.find("table")
+        if self._disease_table:
             self.table_exists = True
 
     # First Row Data
@@ -83,9 +103,9 @@ class CardParser:
         or formatting, and stores it in the data dictionary.
         """
 
-        eudract_number = self.card.find("tr").find("td").text
-        eudract_number = eudract_number.replace("EudraCT Number:", "").strip()
-        eudract_number = eudract_number.replace(" ", "")
+        eudract_number = self._row_tds[0][0].text
+        eudract_number = eudract_number.strip().removeprefix("EudraCT Number:")
+        eudract_number = eudract_number.translate(_SPACE_TBL).strip()
         self.data["eudract_number"] = eudract_number
 
     def get_sponsor_protocol_number(self):
@@ -96,9 +116,9 @@ class CardParser:
         available in the structured data output.
         """
 
-        sponsor_protocol_number = self.card.find("tr").find_all("td")[1].text
-        sponsor_protocol_number = sponsor_protocol_number.replace(
-            "Sponsor Protocol Number:", "").strip()
+        sponsor_protocol_number = self._row_tds[0][1].text
+        sponsor_protocol_number = sponsor_protocol_number.strip().removeprefix(
+            "Sponsor Protocol Number:").strip()
         self.data["sponsor_protocol_number"] = sponsor_protocol_number
 
     def get_start_date(self):
@@ -109,10 +129,9 @@ class CardParser:
         or symbols, and adds it to the data dictionary.
         """
 
-        start_date = self.card.find("tr").find_all("td")[2].text
-        start_date = start_date.replace("Start Date", "").strip()
-        start_date = start_date.replace("*", "").replace(":", "")
-        start_date = start_date.replace(" ", "").replace("\n", "")
+        start_date = self._row_tds[0][2].text
+        start_date = start_date.strip().removeprefix("Start Date")
+        start_date = start_date.translate(_DATE_TBL).strip()
         self.data["start_date"] = start_date
     # Second Row Data
 
@@ -124,9 +143,9 @@ class CardParser:
         spaces, and stores it in the data dictionary.
         """
 
-        sponsor_name = self.card.find_all("tr")[1].find("td").text
-        sponsor_name = sponsor_name.replace("Sponsor Name:", "").strip()
-        sponsor_name = sponsor_name.replace("\n", "")
+        sponsor_name = self._row_tds[1][0].text
+        sponsor_name = sponsor_name.strip().removeprefix("Sponsor Name:")
+        sponsor_name = sponsor_name.strip().translate(_NL_TBL)
         self.data["sponsor_name"] = sponsor_name
     # Third Row Data
 
@@ -138,9 +157,9 @@ class CardParser:
         characters and properly trimmed before adding it to the data dictionary.
         """
 
-        full_title = self.card.find_all("tr")[2].find("td").text
-        full_title = full_title.replace("Full Title:", "").strip()
-        full_title = full_title.replace("\n", "")
+        full_title = self._row_tds[2][0].text
+        full_title = full_title.strip().removeprefix("Full Title:")
+        full_title = full_title.strip().translate(_NL_TBL)
         self.data["full_title"] = str(full_title)
     # Fourth Row Data
 
@@ -152,9 +171,9 @@ class CardParser:
         it for easy readability and inclusion in the data output.
         """
 
-        medical_condition = self.card.find_all("tr")[3].find("td").text
-        medical_condition = medical_condition.replace("Medical condition:", "").strip()
-        medical_condition = medical_condition.replace("\n", "")
+        medical_condition = self._row_tds[3][0].text
+        medical_condition = medical_condition.strip().removeprefix("Medical condition:")
+        medical_condition = medical_condition.strip().translate(_NL_TBL)
         self.data["medical_condition"] = medical_condition
     # Fifth Row Data
 
@@ -167,40 +186,26 @@ class CardParser:
         structured way within the data dictionary.
         """
 
-        self.data["disease"] = {
-            "version": [],
-            "soc_term": [],
-            "classification_code": [],
-            "term": [],
-            "level": []
-        }
-
         if not self.table_exists:
-            for key in self.data["disease"]:
-                self.data["disease"][key] = None
+            self.data["disease"] = dict.fromkeys(DISEASE_KEYS)
             return
 
-        disease_table = self.card.find(
-            "table")
-        tds = disease_table.find_all("td")
-        tds = [td for td in tds if not td.get("class")]
-
-        for i, td in enumerate(tds):
-            if i % 5 == 0:
-                self.data["disease"]["version"].append(td.text.strip())
-            elif i % 5 == 1:
-                self.data["disease"]["soc_term"].append(td.text.strip())
-            elif i % 5 == 2:
-                self.data["disease"]["classification_code"].append(
-                    td.text.strip())
-            elif i % 5 == 3:
-                self.data["disease"]["term"].append(td.text.strip())
-            elif i % 5 == 4:
-                self.data["disease"]["level"].append(td.text.strip())
-
-        for key in self.data["disease"]:
-            self.data["disease"][key] = " ||| ".join(
-                self.data["disease"][key]) if self.data["disease"][key] else None
+        disease = {key: [] for key in DISEASE_KEYS}
+        for row in self._disease_table.find_all("tr"):
+            # Header cells carry a class, data cells do not
+            tds = [td for td in row.find_all("td") if not td.get("class")]
+            if len(tds) < 5:
+                continue
+            version, soc_term, classification_code, term, level = (
+                td.text.strip() for td in tds[:5])
+            disease["version"].append(version)
+            disease["soc_term"].append(soc_term)
+            disease["classification_code"].append(classification_code)
+            disease["term"].append(term)
+            disease["level"].append(level)
+
+        self.data["disease"] = {key: " ||| ".join(values) if values else None
+                                for key, values in disease.items()}
 
     # Sixth Row Data
 
@@ -212,10 +217,9 @@ class CardParser:
         it to the data dictionary for easy reference.
         """
 
-        population_age = self.card.find_all("tr")[-3].find("td").text
-        population_age = population_age.replace(
-            "Population Age:", "").strip()
-        population_age = population_age.replace("\n", "")
+        population_age = self._row_tds[-3][0].text
+        population_age = population_age.strip().removeprefix("Population Age:")
+        population_age = population_age.strip().translate(_NL_TBL)
         self.data["population_age"] = population_age
 
     def get_gender(self):
@@ -226,9 +230,9 @@ class CardParser:
         it in the data dictionary.
         """
 
-        gender = self.card.find_all("tr")[-3].find_all("td")[1].text
-        gender = gender.replace("Gender:", "").strip()
-        gender = gender.replace("\n", "")
+        gender = self._row_tds[-3][1].text
+        gender = gender.strip().removeprefix("Gender:")
+        gender = gender.strip().translate(_NL_TBL)
         self.data["gender"] = gender
     # Seventh Row Data
 
@@ -240,17 +244,17 @@ class CardParser:
         this information into a list of dictionaries within the data output.
         """
 
-        protocols = self.card.find_all("tr")[-2].find("td")
+        protocols = self._row_tds[-2][0]
         trial_protocols = []
         for protocol in protocols.find_all("a"):
-            protocol_name = protocol.text.strip().replace("\n", "")
-            protocol_url = BASE_URL + protocol.get("href")
-            protocol_status = protocol.find_next_sibling("span")
-            if not protocol_status:
+            protocol_name = protocol.text.strip().translate(_NL_TBL)
+            protocol_url = urljoin(BASE_URL, protocol["href"])
+            # A protocol's status is the span sibling directly following its anchor
+            following = protocol.find_next_sibling(["a", "span"])
+            if following is None or following.name != "span":
                 protocol_status = "No Status Available"
             else:
-                protocol_status = protocol_status.text.strip().replace(
-                    "(", "").replace(")", "").replace("\n", "")
+                protocol_status = following.text.strip().translate(_STATUS_TBL)
 
             trial_protocols.append(
                 {"protocol_name": protocol_name, "protocol_url": protocol_url, "protocol_status": protocol_status})
@@ -266,9 +270,9 @@ class CardParser:
         cleaned, made absolute, and added to the data dictionary.
         """
 
-        trial_results_link = self.card.find_all("tr")[-1].find("td").find("a")
+        tds = self._row_tds[-1]
+        trial_results_link = tds[0].find("a", href=True) if tds else None
         if not trial_results_link:
             self.data["trial_results_link"] = None
             return
-        trial_results_link = trial_results_link.get("href")
-        self.data["trial_results_link"] = BASE_URL + trial_results_link
+        self.data["trial_results_link"] = urljoin(BASE_URL, trial_results_link["href"])
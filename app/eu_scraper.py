@@ -1,13 +1,19 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 import logging
 import re
-import requests
+import requests_cache
+from requests_cache.backends.sqlite import SQLiteCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import os
 from pathlib import Path
 from app.card_parser import CardParser
 from app.protocol_parser import ProtocolParser
 from app.result_parser import ResultParser
+from app.utils import MAX_WORKERS, PARSER
 
 # Time in seconds between requests
 REQUEST_DELAY = 10
@@ -15,39 +21,128 @@ REQUEST_DELAY = 10
 # Maximum backoff time in seconds (5 minutes)
 MAX_BACKOFF_TIME = 300
 
+# Maximum number of parsed protocols kept in memory per scraper
+MAX_PROTOCOL_CACHE_SIZE = 10000
+
+# Retry policy for transient HTTP errors
+RETRY = Retry(total=5, backoff_factor=1.0, backoff_max=MAX_BACKOFF_TIME,
+              status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+
 # Base URL for the EU Clinical Trials Register
 BASE_URL = "https://www.clinicaltrialsregister.eu/"
 
 # Custom headers for HTTP requests
 HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Encoding": "gzip, deflate",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.150 Safari/537.36"
 }
 
+# Pattern for reading the result count and page count of a search
+_PAGES_RE = re.compile(r"(\d+) result\(s\) found.*page \d+ of (\d+)")
+
+
+def _is_protocol_table(name, attrs):
+    """
+    Matches the summary, index and section tables of a protocol page.
+    """
+    if name != "table":
+        return False
+    table_id = attrs.get("id") or ""
+    table_class = attrs.get("class") or ""
+    if isinstance(table_class, str):
+        table_class = table_class.split()
+    return table_id.startswith("section-") or "section" in table_class
+
+
+# Only build the parts of each page the parsers actually read
+SEARCH_STRAINER = SoupStrainer("div", {"id": re.compile(r"^tabs(-1)?$")})
+PROTOCOL_STRAINER = SoupStrainer(_is_protocol_table)
+
 HERE = Path(os.path.abspath(os.path.dirname(__file__)))
 DATA_DIR = HERE.parent / "data"
 HTML_DIR = DATA_DIR / "html"
 
+# On-disk HTTP response cache, entries expire after one day
+HTTP_CACHE = DATA_DIR / "http_cache"
+CACHE_EXPIRE_AFTER = 86400
+
+# Time in milliseconds to wait for the cache database while another process writes to it
+CACHE_BUSY_TIMEOUT = 30000
+
+
+def _is_html_response(response):
+    """
+    Only cache HTML pages, result PDF downloads are too large to keep.
+    """
+    return response.headers.get("Content-Type", "").startswith("text/html")
+
+
+class _BestEffortSQLiteCache(SQLiteCache):
+    """
+    SQLite response cache whose write failures are logged rather than raised.
+
+    The response has already been downloaded when it is saved, so a locked or
+    broken cache database should not turn it into a request error.
+    """
+
+    def save_response(self, response, cache_key=None, expires=None):
+        try:
+            super().save_response(response, cache_key, expires)
+        except Exception as e:
+            logging.warning(f"Failed to cache response for {response.url}: {str(e)}")
+
+
 class EUClinicalTrialsScraper:
     """
     A class for scraping data from the EU Clinical Trials Register.
     """
 
-    def __init__(self, start_date, end_date):
+    def __init__(self, start_date, end_date, keep_html=True):
         """
         Initialize the EUClinicalTrialsScraper object.
 
         Args:
             start_date (datetime): The start date for the data query.
             end_date (datetime): The end date for the data query.
+            keep_html (bool, optional): Whether to store the compressed results page HTML. Defaults to True.
         """
         self.start_date = start_date
         self.end_date = end_date
-        self.session = requests.Session()
+        self.keep_html = keep_html
+        DATA_DIR.mkdir(exist_ok=True, parents=True)
+        cache = _BestEffortSQLiteCache(
+            str(HTTP_CACHE), busy_timeout=CACHE_BUSY_TIMEOUT, wal=True)
+        self.session = requests_cache.CachedSession(
+            backend=cache, expire_after=CACHE_EXPIRE_AFTER, filter_fn=_is_html_response)
+        try:
+            self.session.cache.delete(expired=True, vacuum=False)
+        except Exception as e:
+            logging.warning(f"Failed to remove expired cache entries: {str(e)}")
         self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=RETRY)
+        self.session.mount("https://", adapter)
         self.results = {"errors": [], "successes": []}
         self.current_trial_num = 0
+        self._pool = None
+        self._protocol_cache = {}
+
+    @contextmanager
+    def _executor(self):
+        """
+        Provide the thread pool used for concurrent protocol requests.
+
+        Yields the pool of the scrape already in progress, otherwise opens one that
+        is shut down when the outermost block exits.
+        """
+        if self._pool is not None:
+            yield self._pool
+            return
+        try:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as self._pool:
+                yield self._pool
+        finally:
+            self._pool = None
 
     def scrape_trials(self):
         """
@@ -56,30 +151,29 @@ class EUClinicalTrialsScraper:
         Returns:
             dict: A dictionary containing scraped document details and errors.
         """
-        try:
-            soup = self.get_search_page()
-
-            num_pages, num_results = self.get_num_pages_and_results(soup)
-            if not num_results:
-                return self.results
-            logging.info(
-                f"Number of pages: {num_pages}, Number of results: {num_results}")
-            self.scrape_page(soup)
-            if num_pages > 1:
-                for page_number in range(2, num_pages + 1):
-                    try:
-                        soup = self.get_search_page(page_number)
-                        self.scrape_page(soup)
-
-                    except Exception as e:
-                        self.results["errors"].append(
-                            f"Error scraping page {page_number}: {str(e)}")
-                        logging.error(
-                            f"Error scraping page {page_number}: {str(e)}")
+        with self._executor():
+            try:
+                soup = self.get_search_page()
+
+                num_pages, num_results = self.get_num_pages_and_results(soup)
+                if num_results:
+                    logging.info(
+                        f"Number of pages: {num_pages}, Number of results: {num_results}")
+                    self.scrape_page(soup)
+                    for page_number in range(2, num_pages + 1):
+                        try:
+                            soup = self.get_search_page(page_number)
+                            self.scrape_page(soup)
+
+                        except Exception as e:
+                            self.results["errors"].append(
+                                f"Error scraping page {page_number}: {str(e)}")
+                            logging.error(
+                                f"Error scraping page {page_number}: {str(e)}")
 
-        except Exception as e:
-            self.results["errors"].append(
-                f"Error during initial page retrieval: {str(e)}")
+            except Exception as e:
+                self.results["errors"].append(
+                    f"Error during initial page retrieval: {str(e)}")
         return self.results
 
     def scrape_page(self, soup):
@@ -128,7 +222,8 @@ class EUClinicalTrialsScraper:
                 f"&page={page_number}" if page_number else "")
             response = self.session.get(search_url)
             response.raise_for_status()
-            return BeautifulSoup(response.text, "html.parser")
+            return BeautifulSoup(response.content, PARSER,
+                                 parse_only=SEARCH_STRAINER)
         except Exception as e:
             raise Exception(f"Failed to retrieve search page: {str(e)}")
 
@@ -188,8 +283,11 @@ class EUClinicalTrialsScraper:
         """
         Retrieve and parse data from trial protocol URLs.
 
-        Iterates over a list of protocol URLs, fetches their content, and parses
-        the data, compiling a list of dictionaries with protocol details.
+        Protocols already parsed by this scraper are served from its cache. The
+        remaining URLs are submitted to the scraper's thread pool, see _executor, so
+        the requests run concurrently.
+        The parsed protocols are then collected in their original order, compiling a
+        list of dictionaries with protocol details.
 
         Args:
             protocols_urls (list of str): URLs to the trial protocols.
@@ -201,25 +299,66 @@ class EUClinicalTrialsScraper:
             self.results["errors"]: List of error messages encountered during protocol data retrieval.
         """
         HTML_DIR.mkdir(exist_ok=True, parents=True)
+        # Cache hits are read up front, storing fetched protocols below may evict them
+        cached = {}
+        futures = {}
+        with self._executor() as pool:
+            for protocol_url in protocols_urls:
+                if protocol_url in self._protocol_cache:
+                    cached[protocol_url] = self._protocol_cache[protocol_url]
+                elif protocol_url not in futures:
+                    try:
+                        futures[protocol_url] = pool.submit(
+                            self.get_protocol_data, protocol_url)
+                    except Exception as e:
+                        # Reported with the other per-URL errors below
+                        futures[protocol_url] = Future()
+                        futures[protocol_url].set_exception(e)
         protocols = []
         for protocol_url in protocols_urls:
+            if protocol_url in cached:
+                protocols.append(cached[protocol_url])
+                continue
             try:
-                response = self.session.get(protocol_url)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, "html.parser")
-                protocol_data = {"url": protocol_url}
-                protocol_parser = ProtocolParser(soup)
-                protocol_data.update(protocol_parser.parse())
+                protocol_data = futures[protocol_url].result()
+                if len(self._protocol_cache) >= MAX_PROTOCOL_CACHE_SIZE:
+                    del self._protocol_cache[next(iter(self._protocol_cache))]
+                self._protocol_cache[protocol_url] = protocol_data
                 protocols.append(protocol_data)
-                html_file = HTML_DIR / (protocol_url.replace(BASE_URL, "") + ".html")
-                html_file.parent.mkdir(exist_ok=True, parents=True)
-                with open(str(html_file), "w") as f:
-                    f.write(response.text)
             except Exception as e:
                 self.results["errors"].append(
                     f"Error retrieving protocol data for {protocol_url}: {str(e)}")
         return protocols
 
+    def get_protocol_data(self, protocol_url):
+        """
+        Fetch and parse a single trial protocol.
+
+        Sends a GET request to the protocol URL, parses the page with a ProtocolParser
+        instance and saves the raw HTML under the data directory.
+
+        Args:
+            protocol_url (str): The URL of the trial protocol.
+
+        Returns:
+            dict: The parsed protocol data, including its URL.
+
+        Raises:
+            Exception: If retrieval or parsing of the protocol fails.
+        """
+        response = self.session.get(protocol_url)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.content, PARSER,
+                             parse_only=PROTOCOL_STRAINER)
+        protocol_data = {"url": protocol_url}
+        protocol_parser = ProtocolParser(soup)
+        protocol_data.update(protocol_parser.parse())
+        html_file = HTML_DIR / (protocol_url.replace(BASE_URL, "") + ".html")
+        html_file.parent.mkdir(exist_ok=True, parents=True)
+        with open(str(html_file), "wb") as f:
+            f.write(response.content)
+        return protocol_data
+
     def get_results(self, results_url):
         """
         Fetch and parse the results data for a specific trial.
@@ -239,9 +378,10 @@ class EUClinicalTrialsScraper:
         try:
             response = self.session.get(results_url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = BeautifulSoup(response.content, PARSER)
             result_parser = ResultParser(
-                soup, url=results_url, session=self.session)
+                soup, url=results_url, session=self.session, raw_html=response.content,
+                keep_html=self.keep_html)
             return result_parser.parse()
         except Exception as e:
             raise Exception(f"Failed to retrieve results data: {str(e)}")
@@ -268,9 +408,8 @@ class EUClinicalTrialsScraper:
                 "div", {"id": "tabs-1"}).find("div", {"class": "outcome"})
             if not data_section:
                 return None
-            pattern = r"(\d+) result\(s\) found.*page \d+ of (\d+)"
-            text = re.sub(r'\s+', ' ', data_section.text.strip().replace("  ", "").replace(",", "")).strip()
-            match = re.search(pattern, text)
+            text = " ".join(data_section.get_text().replace(",", "").split())
+            match = _PAGES_RE.search(text)
             if not match:
                 return None
             results = match.group(1)
@@ -1,6 +1,12 @@
 import re
 import json
 
+# Translation tables for cleaning cell text in a single pass
+_NL_TBL = str.maketrans("", "", "\n")
+_NL_COLON_TBL = str.maketrans("", "", "\n:")
+
+_NL_RE = re.compile(r"\n")
+
 
 class ProtocolParser:
     """
@@ -16,6 +22,8 @@ class ProtocolParser:
         session (requests.Session, optional): The session object used for HTTP requests. Defaults to None.
     """
 
+    __slots__ = ("session", "soup", "version", "data")
+
     def __init__(self, protocol_page, version=None, session=None):
         self.session = session
         self.soup = protocol_page
@@ -47,16 +55,13 @@ class ProtocolParser:
         dictionary.
         """
 
-        summary_table = self.soup.find("table", class_="section summary").find(
-            "tbody")
+        summary_table = self.soup.select_one("table.section.summary tbody")
         rows = summary_table.find_all("tr")
         summary = {}
         for row in rows:
             cells = row.find_all("td")
-            key = cells[0].get_text().strip().replace(
-                "\n", "").replace(":", "")
-            value = cells[1].get_text().strip().replace("\n", "").replace(
-                ":", "")
+            key = cells[0].get_text().strip().translate(_NL_COLON_TBL)
+            value = cells[1].get_text().strip().translate(_NL_COLON_TBL)
             summary[key] = value
 
         self.data["summary"] = summary
@@ -73,8 +78,8 @@ class ProtocolParser:
         """
 
         index_table = self.soup.find("table", class_="section index")
-        index = [td.get_text() for td in index_table.find_all("td")]
-        index = [re.sub(r"\n", "", item.strip()) for item in index]
+        index = [_NL_RE.sub("", td.get_text().strip())
+                 for td in index_table.find_all("td")]
         return len(index)
 
     def get_section_data(self):
@@ -86,9 +91,9 @@ class ProtocolParser:
         data dictionary under keys corresponding to the section titles.
         """
 
-        tables = self.soup.find_all("table", id=re.compile(r"section-"))
+        tables = self.soup.select("table[id^='section-']")
         for table in tables:
-            header = table.find("th").get_text().strip().replace("\n", "")
+            header = table.find("th").get_text().strip().translate(_NL_TBL)
             self.data[header] = self.get_table_data(table)
 
     def get_table_data(self, table):
@@ -113,10 +118,10 @@ class ProtocolParser:
         for row in rows:
             cells = row.find_all("td")
 
-            key = cells[1].get_text().strip().replace("\n", "") if len(
-                cells) > 1 else cells[0].get_text().strip().replace("\n", "")
+            key = cells[1].get_text().strip().translate(_NL_TBL) if len(
+                cells) > 1 else cells[0].get_text().strip().translate(_NL_TBL)
 
-            value = [cell.get_text().strip().replace("\n", "")
+            value = [cell.get_text().strip().translate(_NL_TBL)
                      for cell in cells[2:]] if len(cells) > 1 else []
 
             if len(value) < 1:
@@ -1,7 +1,13 @@
+import base64
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+import gzip
 import re
 
-from app.utils import extract_text_and_tables_from_pdf
+from app.utils import MAX_WORKERS, PARSER, extract_text_and_tables_from_pdf
+
+_RE_OTHER = re.compile("Other versions")
+_RE_VER = re.compile("Results version number")
 
 
 class ResultParser:
@@ -18,15 +24,20 @@ class ResultParser:
         version (str, optional): The version of the results being parsed. Defaults to None.
         session (requests.Session, optional): The session object used for HTTP requests. Defaults to None.
         url (str, optional): The URL of the result page. Defaults to None.
+        raw_html (bytes, optional): The raw HTML of the result page as fetched. Defaults to None.
+        keep_html (bool, optional): Whether to store the compressed page HTML. Defaults to True.
     """
 
-    def __init__(self, result_page, version=None, session=None, url=None):
+    def __init__(self, result_page, version=None, session=None, url=None, raw_html=None, keep_html=True):
         self.session = session
         self.soup = result_page
         self.version = version
         self.url = url
+        self.raw_html = raw_html
+        self.keep_html = keep_html
         self.data = {}
         self.pdf_link = None
+        self._result_tds = None
 
     def parse(self):
         """
@@ -65,7 +76,7 @@ class ResultParser:
         """
 
         other_versions = self.soup.find_all(
-            "td", class_="labelColumn", string=re.compile("Other versions"))
+            "td", class_="labelColumn", string=_RE_OTHER)
         if len(other_versions) < 1:
             return False
         return True
@@ -74,26 +85,30 @@ class ResultParser:
         """
         Retrieves and parses data from other versions of the trial results.
 
-        If other versions of the trial results are available, this function follows
-        the links to those versions, parses their data, and updates the main data
-        dictionary with the information from each version.
+        If other versions of the trial results are available, this function fetches
+        the linked version pages concurrently, parses their data in order, and updates
+        the main data dictionary with the information from each version.
         """
 
         other_versions = self.soup.find_all(
-            "td", class_="labelColumn", string=re.compile("Other versions"))
+            "td", class_="labelColumn", string=_RE_OTHER)
         if len(other_versions) < 1:
             return
 
         other_versions = other_versions[0].find_next_sibling('td')
-        other_versions = other_versions.find_all("a")
+        other_versions = [(version["href"], version.text.strip().replace("\n", " "))
+                          for version in other_versions.find_all("a")]
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            responses = list(executor.map(
+                self.session.get, [href for href, _ in other_versions]))
 
-        for version in other_versions:
-            response = self.session.get(version["href"])
+        for (href, version_text), response in zip(other_versions, responses):
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            version_text = version.text.strip().replace("\n", " ")
+            soup = BeautifulSoup(response.content, PARSER)
             result = ResultParser(
-                soup, url=version["href"], session=self.session, version=version_text)
+                soup, url=href, session=self.session, version=version_text,
+                raw_html=response.content, keep_html=self.keep_html)
 
             self.data.update(result.parse())
 
@@ -108,7 +123,7 @@ class ResultParser:
 
         if self.version is None:
             version = self.soup.find_all(
-                "td", class_="labelColumn", string=re.compile("Results version number"))
+                "td", class_="labelColumn", string=_RE_VER)
 
             self.version = version[0].find_next_sibling(
                 'td').text.strip().replace("\n", " ")
@@ -119,12 +134,18 @@ class ResultParser:
         """
         Saves the HTML content of the current results page.
 
-        Stores the entire HTML of the result page as a string under the current version's
-        key in the data dictionary. This is useful for archival purposes or further
-        analysis that requires the original page markup.
+        Stores the entire HTML of the result page, gzip-compressed and base64-encoded,
+        under the "html_gzip_b64" key of the current version in the data dictionary. The raw response bytes
+        are used when available so the tree does not have to be serialised again. This
+        is useful for archival purposes or further analysis that requires the original
+        page markup. Skipped when keep_html is False.
         """
 
-        self.data[self.version]["html"] = str(self.soup)
+        if not self.keep_html:
+            return
+        raw_html = self.raw_html if self.raw_html is not None else self.soup.encode()
+        self.data[self.version]["html_gzip_b64"] = base64.b64encode(
+            gzip.compress(raw_html, compresslevel=3)).decode()
 
     def get_summary(self):
         """
@@ -135,24 +156,46 @@ class ResultParser:
         key in the data dictionary for the current version.
         """
 
-        summary = self.soup.find("div", id="resultContent").find("table")
-        summary = summary.find_all("td")
-
-        eudract_number = [td.find_next_sibling(
-            "td").text.strip().replace("\n", "") for td in summary if td.text.strip() == "EudraCT number"]
-        trial_protocol = [td.find_next_sibling(
-            "td") for td in summary if "Trial prot" in td.text.strip()]
+        # Map each cell's text to the first cell carrying it
+        labels = {}
+        for td in self._result_content_tds():
+            labels.setdefault(td.text.strip(), td)
+
+        eudract_number = labels.get("EudraCT number")
+        if eudract_number:
+            eudract_number = eudract_number.find_next_sibling(
+                "td").text.strip().replace("\n", "")
+        trial_protocol = next(
+            (td for label, td in labels.items() if "Trial prot" in label), None)
+        if trial_protocol is None:
+            raise ValueError('Missing "Trial protocol" label in results summary')
         trial_protocol = [a.text.strip().replace("\n", "")
-                          for a in trial_protocol[0].find_all("a")]
-        global_end_date = [td.find_next_sibling(
-            "td").text.strip().replace("\n", "") for td in summary if "Global end" in td.text.strip()]
+                          for a in trial_protocol.find_next_sibling("td").find_all("a")]
+        global_end_date = next(
+            (td for label, td in labels.items() if "Global end" in label), None)
+        if global_end_date:
+            global_end_date = global_end_date.find_next_sibling(
+                "td").text.strip().replace("\n", "")
         self.data[self.version] = {"summary": {
             "url": self.url,
-            "eudract_number": eudract_number[0] if len(eudract_number) > 0 else None,
+            "eudract_number": eudract_number,
             "trial_protocol": trial_protocol,
-            "global_end_date": global_end_date[0] if len(global_end_date) > 0 else None
+            "global_end_date": global_end_date
         }}
 
+    def _result_content_tds(self):
+        """
+        Returns the cells of the main results table, collecting them on first use.
+
+        Returns:
+            list: The td Tags of the first table in the resultContent div.
+        """
+
+        if self._result_tds is None:
+            self._result_tds = self.soup.find(
+                "div", id="resultContent").find("table").find_all("td")
+        return self._result_tds
+
     def get_results_information(self):
         """
         Parses detailed results information from the trial results page.
@@ -162,17 +205,16 @@ class ResultParser:
         key in the data dictionary for the current version.
         """
 
-        results_information = self.soup.find(
-            "div", id="resultContent").find("table")
-        results_information = results_information.find_all("td")
-        results_information_row_index = results_information.index(
-            [td for td in results_information if td.text.strip() == "Results information"][0])
-        results_information = results_information[results_information_row_index:]
+        results_information = self._result_content_tds()
+        results_information_row_index = next(
+            (i for i, td in enumerate(results_information) if td.text.strip() == "Results information"),
+            None)
+        if results_information_row_index is None:
+            raise ValueError('Missing "Results information" label in results page')
+        cells = iter(results_information[results_information_row_index:])
         results_info = {}
-        for i in range(0, len(results_information), 2):
-            key = results_information[i].text.strip().replace("\n", "")
-            value = results_information[i + 1].text.strip().replace("\n", "")
-            results_info[key] = value
+        for key, value in zip(cells, cells):
+            results_info[key.text.strip().replace("\n", "")] = value.text.strip().replace("\n", "")
         results_info.pop("Results information")
         self.data[self.version]["results_information"] = results_info
 
@@ -184,7 +226,7 @@ class ResultParser:
         for data extraction. This function finds such tables by their ID and removes
         them from the BeautifulSoup object to simplify further parsing.
         """
-        for table in self.soup.find_all("table", id=re.compile("Closed$")):
+        for table in self.soup.find_all("table", id=lambda table_id: table_id and table_id.endswith("Closed")):
             table.decompose()
 
     def parse_table_to_json(self, table, table_title):
@@ -206,14 +248,16 @@ class ResultParser:
 
         result = []
         rows = table.find_all('tr')
-        banned_texts = [table_title.lower(), "top of page"]
+        banned_texts = {table_title.lower(), "top of page"}
+        # Most tables have no nested tables, so skip the per-cell search for them
+        has_nested = table.find('table') is not None
         for row in rows:
             cells = row.find_all(['th', 'td'])
+            cell_texts = [cell.get_text(strip=True) for cell in cells]
             row_data = []
             valid_row = False
-            for cell in cells:
-                nested_table = cell.find('table')
-                cell_text = cell.get_text(strip=True)
+            for cell, cell_text in zip(cells, cell_texts):
+                nested_table = cell.find('table') if has_nested else None
                 if nested_table:
                     nested_result = self.parse_table_to_json(
                         nested_table, table_title)
@@ -222,8 +266,7 @@ class ResultParser:
                         valid_row = True
                 elif cell_text.lower() not in banned_texts and cell_text != "":
                     if len(cells) > 1:
-                        row_data.append({cells[0].get_text(strip=True): [
-                            cell.get_text(strip=True) for cell in cells[1:]]})
+                        row_data.append({cell_texts[0]: cell_texts[1:]})
                     else:
                         row_data.append(cell_text)
                     valid_row = True
@@ -252,21 +295,21 @@ class ResultParser:
             return additional_info
 
         jumper_links = jumper_links_div.find_all('a', href=True)[:-2]
-        table_ids = [link['href'][1:] for link in jumper_links]
+        section_titles = {}
+        for link in jumper_links:
+            section_titles.setdefault(link['href'][1:], link.get_text().strip())
 
         tables = jumper_links_div.find_next_siblings("table")
 
-        current_section = None
+        title = None
         for table in tables:
 
             table_id = table.get('id')
-            if table_id in table_ids:
-                current_section = table_ids.index(table_id)
-                title = jumper_links[current_section].get_text().strip()
+            if table_id in section_titles:
+                title = section_titles[table_id]
                 additional_info[title] = [
                     self.parse_table_to_json(table, title)]
-            elif current_section is not None:
-                title = jumper_links[current_section].get_text().strip()
+            elif title is not None:
                 additional_info[title].append(
                     self.parse_table_to_json(table, title))
 
@@ -1,42 +1,60 @@
 import logging
 import os
-import json
 from datetime import datetime
+import orjson
 import pandas as pd
 import pdfplumber
+import shutil
+import tempfile
 import zipfile
 from io import BytesIO, StringIO
 
+# BeautifulSoup tree builder, lxml is the fast C-based parser
+PARSER = "lxml"
 
-def setup_logging():
+# Maximum number of concurrent requests per thread pool
+MAX_WORKERS = 8
+
+# PDFs larger than this are spooled to disk rather than held in memory
+PDF_SPOOL_MAX_SIZE = 50 * 1024 * 1024
+
+
+def setup_logging(log_filename=None):
     """
     Sets up logging for the application.
 
     This function creates a log directory if it doesn't exist and sets up a log file with the current date as the filename.
     The log file will contain log messages with the format: "<timestamp> <log_level>: <message>".
+    When an existing log file is given, messages are appended to it instead, so worker processes
+    can log to the same file as the main process.
 
     Args:
-        None
+        log_filename (str, optional): An existing log file to append to. Defaults to None.
 
     Returns:
-        None
+        str: The path of the log file.
     """
-    log_directory = os.path.join(os.path.dirname(__file__), '..', 'logs')
-    os.makedirs(log_directory, exist_ok=True)
-    log_filename = os.path.join(
-        log_directory, datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + "-run.log")
+    if log_filename is None:
+        log_directory = os.path.join(os.path.dirname(__file__), '..', 'logs')
+        os.makedirs(log_directory, exist_ok=True)
+        log_filename = os.path.join(
+            log_directory, datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + "-run.log")
+        filemode = 'w'
+    else:
+        filemode = 'a'
 
     logging.basicConfig(level=logging.INFO,
                         format='%(asctime)s %(levelname)s: %(message)s',
                         datefmt='%Y-%m-%d %H:%M:%S',
                         filename=log_filename,
-                        filemode='w')
+                        filemode=filemode)
 
     console = logging.StreamHandler()
     console.setLevel(logging.INFO)
     formatter = logging.Formatter('%(asctime)s %(levelname)s ->\t %(message)s')
     console.setFormatter(formatter)
     logging.getLogger('').addHandler(console)
+    return log_filename
 
 
 def write_json_to_disk(json_object, query_details):
@@ -45,28 +63,31 @@ def write_json_to_disk(json_object, query_details):
     filename = f"""{query_details['start_date']}_{
     query_details['end_date']}_{query_details['run_date']}.json"""
     file_path = os.path.join(data_directory, filename)
-    with open(file_path, 'w') as f:
-        json.dump(json_object, f)
+    with open(file_path, 'wb') as f:
+        f.write(orjson.dumps(json_object))
     logging.info(f"Successfully wrote JSON to disk: {filename}")
 
 
 def extract_text_and_tables_from_pdf(zip_bytes):
-    text = ""
+    text_parts = []
     tables = []
     zip_in_memory = BytesIO(zip_bytes)
 
     with zipfile.ZipFile(zip_in_memory, 'r') as zip_ref:
         pdf_name = zip_ref.namelist()[0]
-        with zip_ref.open(pdf_name) as pdf_file_in_zip:
-            pdf_bytes = BytesIO(pdf_file_in_zip.read())
-            with pdfplumber.open(pdf_bytes) as pdf:
+        with zip_ref.open(pdf_name) as pdf_file_in_zip, \
+                tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE) as pdf_file:
+            shutil.copyfileobj(pdf_file_in_zip, pdf_file)
+            pdf_file.seek(0)
+            with pdfplumber.open(pdf_file) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
-                        text += page_text + "\n"
-                    page_tables = page.extract_tables()
-                    for table in page_tables:
-                        tables.append(table)
+                        text_parts.append(page_text)
+                    tables.extend(page.extract_tables())
+                    # Drop the page's cached layout objects once it is processed
+                    page.close()
+    text = "\n".join(text_parts) + "\n" if text_parts else ""
     return text, tables
 
 
@@ -78,9 +99,9 @@ def get_json_data_in_pandas(json_data):
                                 'full_title', 'version', 'soc_term', 'classification_code', 'term', 'level', 'json']
     trial_protocols_columns = ['protocol_id', 'eudract_number', 'url', 'json']
     trial_results_columns = ['eudract_number', 'version', 'url', 'json']
-    cards_df = pd.DataFrame(columns=trial_info_cards_columns)
-    protocols_df = pd.DataFrame(columns=trial_protocols_columns)
-    results_df = pd.DataFrame(columns=trial_results_columns)
+    cards_rows = []
+    protocols_rows = []
+    results_rows = []
 
     for result in json_data["successes"]:
         if not result:
@@ -88,17 +109,14 @@ def get_json_data_in_pandas(json_data):
         trial_info_card = result["card"]
         card_disease = trial_info_card["disease"]
         eudract_number = trial_info_card['eudract_number']
-        trial_start_date = pd.to_datetime(trial_info_card['start_date'], errors='coerce')
         protocols = result['protocols']
-        if pd.isnull(trial_start_date):
-            trial_start_date = None
 
         if trial_info_card['full_title'].endswith('...'):
             trial_info_card['full_title'] = protocols[0]["A. Protocol Information"]["Full title of the trial"][0]
 
-        new_card_info_row = [
+        cards_rows.append((
             eudract_number,
-            trial_start_date,
+            trial_info_card['start_date'],
             trial_info_card['sponsor_name'],
             trial_info_card['full_title'],
             card_disease['version'],
@@ -106,23 +124,27 @@ def get_json_data_in_pandas(json_data):
             card_disease['classification_code'],
             card_disease['term'],
             card_disease['level'],
-            json.dumps(result)
-        ]
-        cards_df.loc[len(cards_df)] = new_card_info_row
+            orjson.dumps(result).decode()
+        ))
 
         # protocol id is unique because it combines the eudract number and the protocol letters/digits
         for protocol in protocols:
             protocol_id = protocol['url'].split('/')
             protocol_id = '-'.join(protocol_id[-2:])
 
-            protocols_df.loc[len(protocols_df)] = [protocol_id, eudract_number, protocol['url'], json.dumps(protocol)]
+            protocols_rows.append((protocol_id, eudract_number, protocol['url'], orjson.dumps(protocol).decode()))
 
         results = result['results'] if 'results' in result else None
         if not results:
             continue
         for version, value in results.items():
-            results_df.loc[len(results_df)] = [eudract_number, version, value['summary']['url'], json.dumps(value)]
-        logging.info(f"Cards: {cards_df.shape}, Protocols: {protocols_df.shape}, Results: {results_df.shape}")
+            results_rows.append((eudract_number, version, value['summary']['url'], orjson.dumps(value).decode()))
+
+    cards_df = pd.DataFrame.from_records(cards_rows, columns=trial_info_cards_columns)
+    cards_df['start_date'] = pd.to_datetime(cards_df['start_date'], errors='coerce', format='%Y-%m-%d')
+    protocols_df = pd.DataFrame.from_records(protocols_rows, columns=trial_protocols_columns)
+    results_df = pd.DataFrame.from_records(results_rows, columns=trial_results_columns)
+    logging.info(f"Cards: {cards_df.shape}, Protocols: {protocols_df.shape}, Results: {results_df.shape}")
     return cards_df, protocols_df, results_df
 
 
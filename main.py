@@ -1,10 +1,12 @@
 import argparse
-import json
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from itertools import repeat
 from pathlib import Path
 
+import orjson
 from dotenv import load_dotenv
 
 from app.eu_scraper import EUClinicalTrialsScraper
@@ -13,6 +15,13 @@ from app.utils import setup_logging
 HERE = Path(os.path.abspath(os.path.dirname(__file__)))
 DATA_DIR = HERE / "data"
 
+# Write buffer size in bytes for the JSONL output files
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Number of days scraped at the same time. Each day already runs its own
+# thread pools, so keep this low to avoid flooding the register with requests
+MAX_PARALLEL_DAYS = 2
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description='EU Clinical Trials Scraper')
@@ -20,6 +29,8 @@ def parse_args():
                         help='Start date in YYYY-MM-DD format')
     parser.add_argument('--end-date', type=str, required=True,
                         help='End date in YYYY-MM-DD format')
+    parser.add_argument('--no-html', action='store_true',
+                        help='Do not store the compressed results page HTML')
     return parser.parse_args()
 
 
@@ -34,8 +45,9 @@ def validate_dates(start_date, end_date):
     return start_date, end_date
 
 
-def scrape_by_date_range(start_date, end_date):
-    scraper = EUClinicalTrialsScraper(start_date, end_date)
+def scrape_by_date_range(start_date, end_date, keep_html=True):
+    logging.info(f"Scraping data for {start_date} to {end_date}")
+    scraper = EUClinicalTrialsScraper(start_date, end_date, keep_html=keep_html)
     results = scraper.scrape_trials()
     output = {
         "metadata": {
@@ -54,41 +66,47 @@ def scrape_by_date_range(start_date, end_date):
     return output, query_details
 
 
-def main():
-    setup_logging()
-    load_dotenv()
-    args = parse_args()
+def write_outputs(current_date, output, query_details):
+    current_folder = DATA_DIR / current_date.strftime("%Y-%m-%d")
+    current_folder.mkdir(exist_ok=True)
 
-    DATA_DIR.mkdir(exist_ok=True, parents=True)
+    with (current_folder / "query_details.json").open("wb") as f:
+        f.write(orjson.dumps(query_details))
 
-    start_date, end_date = validate_dates(args.start_date, args.end_date)
+    with (current_folder / "successes.jsonl").open("wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.writelines(orjson.dumps(result, default=str) + b"\n"
+                     for result in output["successes"] if result)
 
-    current_date = start_date
-    while current_date <= end_date:
-        logging.info(f"Scraping data for {current_date}")
-        output, query_details = scrape_by_date_range(
-            current_date, current_date)
-        logging.info(f"Scraping complete for {current_date}")
+    with (current_folder / "errors.jsonl").open("wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.writelines(orjson.dumps(result, default=str) + b"\n"
+                     for result in output["errors"] if result)
 
-        current_folder = DATA_DIR / current_date.strftime("%Y-%m-%d")
-        current_folder.mkdir(exist_ok=True)
 
-        with (current_folder / "query_details.json").open("w") as f:
-            json.dump(query_details, f)
+def init_worker(log_filename):
+    # Forked workers inherit the handlers, spawned ones start unconfigured
+    if not logging.getLogger('').handlers:
+        setup_logging(log_filename)
 
-        with (current_folder / "successes.jsonl").open("w") as f:
-            for result in output["successes"]:
-                if not result:
-                    continue
-                f.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
 
-        with (current_folder / "errors.jsonl").open("w") as f:
-            for result in output["errors"]:
-                if not result:
-                    continue
-                f.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+def main():
+    log_filename = setup_logging()
+    load_dotenv()
+    args = parse_args()
+
+    DATA_DIR.mkdir(exist_ok=True, parents=True)
+
+    start_date, end_date = validate_dates(args.start_date, args.end_date)
 
-        current_date += timedelta(days=1)
+    dates = [start_date + timedelta(days=i)
+             for i in range((end_date - start_date).days + 1)]
+    logging.info(f"Scraping data for {len(dates)} days from {start_date} to {end_date}")
+    with ProcessPoolExecutor(max_workers=min(MAX_PARALLEL_DAYS, len(dates)),
+                             initializer=init_worker, initargs=(log_filename,)) as executor:
+        for current_date, (output, query_details) in zip(
+                dates, executor.map(scrape_by_date_range, dates, dates,
+                                    repeat(not args.no_html))):
+            logging.info(f"Scraping complete for {current_date}")
+            write_outputs(current_date, output, query_details)
 
 
 if __name__ == "__main__":